@@ -1,11 +1,11 @@
 import ast
+import builtins
 import math
 import os
-import re
 import runpy
 import subprocess
 from collections.abc import Callable, Mapping, Sequence
-from functools import reduce
+from functools import cache, lru_cache
 from pathlib import Path
 from pprint import pformat
 from typing import TextIO
@@ -32,7 +32,7 @@ class Update:
             code = compile(func, "<update>", "eval")
 
             def _from_expr(v):
-                return eval(code, {}, {"v": v, "math": math})
+                return eval(code, {"__builtins__": builtins, "math": math, "v": v})
 
             self.func = _from_expr
         else:
@@ -53,7 +53,7 @@ class Lazy:
             code = compile(func, "<lazy>", "eval")
 
             def _from_expr(c):
-                return eval(code, {}, {"c": c, "math": math})
+                return eval(code, {"__builtins__": builtins, "math": math, "c": c})
 
             self.func = _from_expr
         else:
@@ -78,8 +78,11 @@ def load(
     """
 
     paths = [path] if isinstance(path, (str, os.PathLike)) else list(path)
-    configs = [cfg for p in paths for cfg in _collect_config_specs(Path(p))]
-    cfg = reduce(merge, configs, {})
+    cache: dict[Path, list[dict]] = {}
+    cfg = {}
+    for p in paths:
+        for config in _collect_config_specs(Path(p), cache):
+            _merge_into(cfg, config)
     if overrides:
         apply_overrides(cfg, overrides)
     if resolve_lazy:
@@ -87,11 +90,18 @@ def load(
     return cfg
 
 
-def _collect_config_specs(path: os.PathLike) -> list[dict]:
+def _collect_config_specs(
+    path: os.PathLike, cache: dict[Path, list[dict]] | None = None
+) -> list[dict]:
     """
     Return the flattened inheritance chain for the config at `path`. Ordered from the farthest parent first.
+
+    `cache` maps resolved paths to their chains so each file in a diamond-shaped
+    hierarchy executes only once per load.
     """
     path = Path(path).resolve()
+    if cache is not None and path in cache:
+        return cache[path]
     config_module_globs = runpy.run_path(str(path), run_name="__config__")
 
     config = config_module_globs.get("config", {})
@@ -100,11 +110,14 @@ def _collect_config_specs(path: os.PathLike) -> list[dict]:
     if isinstance(parents, str):
         parents = [parents]
 
-    return [
+    specs = [
         parent_cfg_specs
         for parent in parents or []
-        for parent_cfg_specs in _collect_config_specs(path.parent / Path(parent))
+        for parent_cfg_specs in _collect_config_specs(path.parent / Path(parent), cache)
     ] + [config]
+    if cache is not None:
+        cache[path] = specs
+    return specs
 
 
 def dump(
@@ -155,18 +168,16 @@ def _format_snapshot(
     format: str = "pretty",
     sort_keys: bool = False,
 ) -> str:
-    if sort_keys and format in {"raw", "ruff"}:
-        config = _sort_keys(config)
-    if format == "raw":
-        config_str = "config = " + repr(config)
-    elif format == "pretty":
-        config_str = "config = " + pformat(
-            config, width=88, sort_dicts=sort_keys
-        )
-    elif format == "ruff":
-        config_str = _ruff_format("config = " + repr(config))
-    else:
+    if format == "pretty":
+        # pformat sorts dict keys itself, so no pre-sorted copy is needed.
+        return "config = " + pformat(config, width=88, sort_dicts=sort_keys) + "\n"
+    if format not in {"raw", "ruff"}:
         raise ValueError(f"Unknown format: {format}")
+    if sort_keys:
+        config = _sort_keys(config)
+    config_str = "config = " + repr(config)
+    if format == "ruff":
+        config_str = _ruff_format(config_str)
     return config_str + "\n"
 
 
@@ -198,16 +209,11 @@ def format(
     raise ValueError(f"Unknown format: {format}")
 
 
+# Snapshots are often re-emitted unchanged, and each miss spawns a ruff process.
+@lru_cache(maxsize=256)
 def _ruff_format(source: str) -> str:
-    try:
-        from ruff.__main__ import find_ruff_bin
-    except ModuleNotFoundError as exc:
-        raise ModuleNotFoundError(
-            "Ruff is not installed; install cfgx[format] to use format='ruff'."
-        ) from exc
-
     result = subprocess.run(
-        [find_ruff_bin(), "format", "--isolated", "--stdin-filename=config.py", "-"],
+        [_ruff_bin(), "format", "--isolated", "--stdin-filename=config.py", "-"],
         input=source,
         text=True,
         capture_output=True,
@@ -217,11 +223,30 @@ def _ruff_format(source: str) -> str:
     return result.stdout.rstrip("\n")
 
 
+@cache
+def _ruff_bin() -> str:
+    try:
+        from ruff.__main__ import find_ruff_bin
+    except ModuleNotFoundError as exc:
+        raise ModuleNotFoundError(
+            "Ruff is not installed; install cfgx[format] to use format='ruff'."
+        ) from exc
+    return find_ruff_bin()
+
+
 def _sort_keys(value):
+    """Return `value` with dict keys sorted; lists of scalars are returned as-is."""
     if isinstance(value, dict):
-        return {key: _sort_keys(value[key]) for key in sorted(value)}
+        try:
+            keys = sorted(value)
+        except TypeError:
+            keys = sorted(value, key=str)
+        return {key: _sort_keys(value[key]) for key in keys}
     if isinstance(value, list):
-        return [_sort_keys(item) for item in value]
+        for item in value:
+            if isinstance(item, (dict, list)):
+                return [_sort_keys(item) for item in value]
+        return value
     return value
 
 
@@ -234,25 +259,53 @@ def merge(base: dict, override: dict):
     transforms the previous value, and other values simply override. Returns a new
     dictionary without mutating the inputs.
     """
-    base = base.copy()
+    merged = _copy_dicts(base)
+    _merge_into(merged, override)
+    return merged
+
+
+# Override values that need per-key handling; anything else is a plain assignment.
+_MERGE_SPECIAL = (dict, Delete, Replace, Update)
+
+
+def _merge_into(base: dict, override: dict):
+    """
+    Merge `override` into `base` in place.
+
+    Nested dicts of `base` are updated directly, so `base` must own them. Dicts taken
+    from `override` (including Replace values and Update results) are merged into
+    fresh dicts or copied, and never aliased.
+    """
     for k, v in override.items():
-        if isinstance(v, dict):
-            if k in base and isinstance(base[k], dict):
-                base[k] = merge(base[k], v)
-            else:
-                base[k] = merge({}, v)
+        if not isinstance(v, _MERGE_SPECIAL):
+            base[k] = v
+        elif isinstance(v, dict):
+            target = base.get(k)
+            if not isinstance(target, dict):
+                target = base[k] = {}
+            _merge_into(target, v)
         elif isinstance(v, Delete):
             base.pop(k, None)
         elif isinstance(v, Replace):
-            base[k] = v.value
+            base[k] = _own(v.value)
         elif isinstance(v, Update):
             if k in base:
-                base[k] = _apply_update(base[k], v)
+                base[k] = _own(_apply_update(base[k], v))
             else:
-                base[k] = _apply_missing_update(v)
-        else:
-            base[k] = v
-    return base
+                base[k] = _own(_apply_missing_update(v))
+
+
+def _copy_dicts(value: dict) -> dict:
+    copied = value.copy()
+    for k, v in copied.items():
+        if isinstance(v, dict):
+            copied[k] = _copy_dicts(v)
+    return copied
+
+
+def _own(value):
+    """Copy dict structure that later merges may update in place."""
+    return _copy_dicts(value) if isinstance(value, dict) else value
 
 
 def apply_overrides(cfg: dict, overrides: Sequence[str]):
@@ -264,25 +317,28 @@ def apply_overrides(cfg: dict, overrides: Sequence[str]):
     the dictionary in place and returns it.
     """
 
+    walked = None  # (parent key path, parent) of the previous override
     for override in overrides:
         key, op, value = _split_override(override)
+        if op == "!=" and value:
+            raise ValueError(f"Delete overrides must not include a value: {override}")
+        handler, create = _OVERRIDE_OPS[op]
         keys = parse_key_path(key)
-        if op == "+=":
-            append_to_nested(cfg, keys, infer_type(value))
-        elif op == "!=":
-            if value:
-                raise ValueError(
-                    f"Delete overrides must not include a value: {override}"
-                )
-            delete_nested(cfg, keys)
-        elif op == "-=":
-            remove_value_from_list(cfg, keys, infer_type(value))
+        # Consecutive overrides under the same parent reuse the previous walk; an
+        # override only mutates its parent, never the containers above it.
+        if walked is not None and walked[0] == keys[:-1]:
+            parent = walked[1]
+        elif create:
+            parent, _ = _walk_to_parent(cfg, keys, create=True)
+            walked = (keys[:-1], parent)
         else:
-            parsed_value = infer_type(value)
-            if isinstance(parsed_value, Update):
-                update_nested(cfg, keys, parsed_value)
-            else:
-                set_nested(cfg, keys, parsed_value)
+            parent, _ = _walk_to_parent_if_exists(cfg, keys)
+            if parent is None:
+                # Deletes and removals on missing paths are no-ops.
+                walked = None
+                continue
+            walked = (keys[:-1], parent)
+        handler(parent, keys[-1], value)
     return cfg
 
 
@@ -302,61 +358,91 @@ def _resolve_lazy(cfg: dict):
     return cfg
 
 
-def _get_path(root, path):
-    value = root
-    for key in path:
-        value = value[key]
-    return value
-
-
-def _set_path(root, path, value):
-    target = root
+def _walk(root, path):
+    """Return `(parent, key, value)` for the non-empty `path` in one traversal."""
+    parent = root
     for key in path[:-1]:
-        target = target[key]
-    target[path[-1]] = value
+        parent = parent[key]
+    key = path[-1]
+    return parent, key, parent[key]
 
 
 def _format_path(path: tuple):
-    out = []
-    for key in path:
-        if isinstance(key, int):
-            out.append(f"[{key}]")
-        else:
-            if out:
-                out.append(".")
-            out.append(str(key))
-    return "".join(out)
+    return "".join(
+        f"[{key}]" if isinstance(key, int) else f".{key}" if i else str(key)
+        for i, key in enumerate(path)
+    )
+
+
+# Exact types that can never hold or be a Lazy.
+_LEAF_TYPES = frozenset({int, float, str, bool, type(None), bytes})
 
 
 class _LazyResolver:
     def __init__(self, root):
         self.root = root
-        self._resolving = []
+        self._resolving_set = set()
+        self._resolving_stack = []
+        # Lazies and every container above one, keyed by id. Holding the nodes
+        # keeps their ids from being reused while resolution runs.
+        self._lazy_nodes = {}
+        # Proxies handed to Lazies, keyed by path and reused while their container
+        # is unchanged.
+        self._proxies = {}
 
     def resolve_all(self):
-        self._resolve_value((), self.root, resolve_children=True)
+        try:
+            if self._mark_lazy(self.root):
+                self._resolve_value((), self.root, resolve_children=True)
+        finally:
+            self._proxies.clear()
+
+    def _mark_lazy(self, value) -> bool:
+        if isinstance(value, Lazy):
+            found = True
+        elif isinstance(value, (dict, list)):
+            found = False
+            for child in value.values() if isinstance(value, dict) else value:
+                if self._mark_lazy(child):
+                    found = True
+        else:
+            return False
+        if found:
+            self._lazy_nodes[id(value)] = value
+        return found
 
     def resolve_at(self, path):
         if not path:
             return self._resolve_value((), self.root, resolve_children=False)
-        value = _get_path(self.root, path)
+        parent, key, value = _walk(self.root, path)
         resolved = self._resolve_value(path, value, resolve_children=False)
         if resolved is not value:
-            _set_path(self.root, path, resolved)
+            parent[key] = resolved
         return resolved
 
     def _resolve_value(self, path, value, *, resolve_children: bool):
+        if type(value) in _LEAF_TYPES:
+            return value
         if isinstance(value, Lazy):
-            if path in self._resolving:
-                raise ValueError(f"Lazy cycle detected at {_format_path(path)}")
-            self._resolving.append(path)
+            if path in self._resolving_set:
+                cycle = self._resolving_stack[self._resolving_stack.index(path) :]
+                chain = " -> ".join(_format_path(p) for p in [*cycle, path])
+                raise ValueError(
+                    f"Lazy cycle detected at {_format_path(path)} ({chain})"
+                )
+            self._resolving_set.add(path)
+            self._resolving_stack.append(path)
             try:
                 value = value.func(_wrap_proxy(self, (), self.root))
             finally:
-                self._resolving.pop()
+                self._resolving_set.discard(path)
+                self._resolving_stack.pop()
+            self._mark_lazy(value)
         if resolve_children and isinstance(value, dict):
-            for key in list(value.keys()):
-                child = value[key]
+            # Only existing keys are reassigned, so iterating in place is safe.
+            for key, child in value.items():
+                if id(child) not in self._lazy_nodes:
+                    continue
                 resolved_child = self._resolve_value(
                     path + (key,),
                     child,
@@ -365,8 +451,9 @@ class _LazyResolver:
                 if resolved_child is not child:
                     value[key] = resolved_child
         elif resolve_children and isinstance(value, list):
-            for index in range(len(value)):
-                child = value[index]
+            for index, child in enumerate(value):
+                if id(child) not in self._lazy_nodes:
+                    continue
                 resolved_child = self._resolve_value(
                     path + (index,),
                     child,
@@ -378,17 +465,20 @@ class _LazyResolver:
 
 
 def _wrap_proxy(resolver: _LazyResolver, path: tuple, value):
-    if isinstance(value, dict):
-        return _LazyDictProxy(resolver, path)
-    if isinstance(value, list):
-        return _LazyListProxy(resolver, path)
-    return value
+    if not isinstance(value, (dict, list)):
+        return value
+    proxy = resolver._proxies.get(path)
+    if proxy is None or proxy._container is not value:
+        proxy_type = _LazyDictProxy if isinstance(value, dict) else _LazyListProxy
+        proxy = resolver._proxies[path] = proxy_type(resolver, path, value)
+    return proxy
 
 
 class _LazyDictProxy(Mapping):
-    def __init__(self, resolver: _LazyResolver, path: tuple):
+    def __init__(self, resolver: _LazyResolver, path: tuple, container: dict):
         self._resolver = resolver
         self._path = path
+        self._container = container
 
     def __getitem__(self, key):
         path = self._path + (key,)
@@ -396,64 +486,121 @@ class _LazyDictProxy(Mapping):
         return _wrap_proxy(self._resolver, path, value)
 
     def __iter__(self):
-        container = _get_path(self._resolver.root, self._path)
-        return iter(container)
+        return iter(self._container)
 
     def __len__(self):
-        container = _get_path(self._resolver.root, self._path)
-        return len(container)
+        return len(self._container)
 
     def __getattr__(self, name):
-        if name.startswith("_"):
+        if name[:1] == "_":
             raise AttributeError(name)
+        path = self._path + (name,)
         try:
-            return self[name]
+            value = self._resolver.resolve_at(path)
         except KeyError as exc:
             raise AttributeError(name) from exc
+        return _wrap_proxy(self._resolver, path, value)
 
 
 class _LazyListProxy(Sequence):
-    def __init__(self, resolver: _LazyResolver, path: tuple):
+    def __init__(self, resolver: _LazyResolver, path: tuple, container: list):
         self._resolver = resolver
         self._path = path
+        self._container = container
 
     def __getitem__(self, index):
         if isinstance(index, slice):
-            return [self[i] for i in range(*index.indices(len(self)))]
+            return [self[i] for i in range(*index.indices(len(self._container)))]
         path = self._path + (index,)
         value = self._resolver.resolve_at(path)
         return _wrap_proxy(self._resolver, path, value)
 
     def __len__(self):
-        container = _get_path(self._resolver.root, self._path)
-        return len(container)
+        return len(self._container)
 
 
 def parse_key_path(path: str):
     """Parse 'a.b[0].c' → ['a', 'b', 0, 'c']"""
+    if "[" not in path:
+        if "." not in path:
+            return [path] if path else []
+        return [part for part in path.split(".") if part]
     tokens = []
-    parts = re.split(r"(\[-?\d+\]|\.)", path)
-    for part in parts:
-        if not part or part == ".":
-            continue
-        if part.startswith("[") and part.endswith("]"):
-            tokens.append(int(part[1:-1]))
-        else:
+    for part in path.split("."):
+        if "[" in part:
+            _scan_indices(part, tokens)
+        elif part:
             tokens.append(part)
     return tokens
 
 
+def _scan_indices(part: str, tokens: list):
+    start = pos = 0
+    while True:
+        bracket = part.find("[", pos)
+        if bracket == -1:
+            break
+        close = part.find("]", bracket + 1)
+        if close == -1:
+            break
+        index = part[bracket + 1 : close]
+        digits = index[1:] if index[:1] == "-" else index
+        if not digits.isdecimal():
+            pos = bracket + 1
+            continue
+        if start < bracket:
+            tokens.append(_path_piece(part[start:bracket]))
+        tokens.append(int(index))
+        pos = start = close + 1
+    if start < len(part):
+        tokens.append(_path_piece(part[start:]))
+
+
+def _path_piece(piece: str):
+    # A leftover piece that is wholly bracketed, like "[+1]" or "[ 0]", is still
+    # an index, as it was under the old regex split.
+    if piece[:1] == "[" and piece[-1:] == "]":
+        return int(piece[1:-1])
+    return piece
+
+
 def _split_override(override: str):
-    try:
-        idx = override.index("=")
-    except ValueError as exc:
-        raise ValueError(f"Invalid override: {override}") from exc
-    op = "="
-    key_end = idx
-    if idx > 0 and override[idx - 1] in "+-!":
-        op = override[idx - 1 : idx + 1]
-        key_end = idx - 1
-    return override[:key_end], op, override[idx + 1 :]
+    key, eq, value = override.partition("=")
+    if not eq:
+        raise ValueError(f"Invalid override: {override}")
+    op = key[-1:]
+    if op and op in "+-!":
+        return key[:-1], op + eq, value
+    return key, eq, value
+
+
+def _override_set(parent, key, value: str):
+    parsed_value = infer_type(value)
+    if isinstance(parsed_value, Update):
+        _update_item(parent, key, parsed_value)
+    else:
+        _assign_item(parent, key, parsed_value)
+
+
+def _override_append(parent, key, value: str):
+    _append_item(parent, key, infer_type(value))
+
+
+def _override_remove(parent, key, value: str):
+    _remove_item(parent, key, infer_type(value))
+
+
+def _override_delete(parent, key, value: str):
+    _delete_item(parent, key)
+
+
+# Operator -> (handler, whether missing parents are created).
+_OVERRIDE_OPS = {
+    "=": (_override_set, True),
+    "+=": (_override_append, True),
+    "-=": (_override_remove, False),
+    "!=": (_override_delete, False),
+}
 
 
 def set_nested(d: dict, keys, value):
@@ -463,6 +610,29 @@ def set_nested(d: dict, keys, value):
 
 def update_nested(d: dict, keys, updater: Update):
     parent, last_key = _walk_to_parent(d, keys, create=True)
+    _update_item(parent, last_key, updater)
+
+
+def append_to_nested(d: dict, keys, value):
+    parent, last_key = _walk_to_parent(d, keys, create=True)
+    _append_item(parent, last_key, value)
+
+
+def delete_nested(d: dict, keys):
+    parent, last_key = _walk_to_parent_if_exists(d, keys)
+    if parent is None:
+        return
+    _delete_item(parent, last_key)
+
+
+def remove_value_from_list(d: dict, keys, value):
+    parent, last_key = _walk_to_parent_if_exists(d, keys)
+    if parent is None:
+        return
+    _remove_item(parent, last_key, value)
+
+
+def _update_item(parent, last_key, updater: Update):
     try:
         current_value = parent[last_key]
     except (KeyError, IndexError):
@@ -472,8 +642,7 @@ def update_nested(d: dict, keys, updater: Update):
     _assign_item(parent, last_key, next_value)
 
 
-def append_to_nested(d: dict, keys, value):
-    parent, last_key = _walk_to_parent(d, keys, create=True)
+def _append_item(parent, last_key, value):
     try:
         target = parent[last_key]
     except IndexError:
@@ -490,20 +659,14 @@ def append_to_nested(d: dict, keys, value):
     _assign_item(parent, last_key, target)
 
 
-def delete_nested(d: dict, keys):
-    parent, last_key = _walk_to_parent_if_exists(d, keys)
-    if parent is None:
-        return
+def _delete_item(parent, last_key):
     try:
         del parent[last_key]
     except (KeyError, IndexError):
         return
 
 
-def remove_value_from_list(d: dict, keys, value):
-    parent, last_key = _walk_to_parent_if_exists(d, keys)
-    if parent is None:
-        return
+def _remove_item(parent, last_key, value):
     try:
         target = parent[last_key]
     except (KeyError, IndexError):
@@ -561,11 +724,24 @@ def _walk_to_parent_if_exists(d: dict, keys):
     return current, keys[-1]
 
 
+_NAME_CONSTANTS = {"True": True, "False": False, "None": None}
+
+
 def infer_type(val: str):
     if val.startswith("lazy:"):
         return Lazy(val[len("lazy:") :])
     if val.startswith("update:"):
         return Update(val[len("update:") :])
+    # Bare names and plain decimal ints skip the AST round-trip; anything else
+    # (floats, containers, quoted strings) still goes through literal_eval.
+    if val.isidentifier():
+        return _NAME_CONSTANTS.get(val, val)
+    digits = val[1:] if val[:1] == "-" else val
+    if digits.isascii() and digits.isdigit() and (digits[0] != "0" or digits == "0"):
+        try:
+            return int(val)
+        except ValueError:
+            pass
     try:
         return ast.literal_eval(val)
     except (ValueError, SyntaxError):
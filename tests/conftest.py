@@ -0,0 +1,22 @@
+import textwrap
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def config_dir(tmp_path_factory):
+    """Write each distinct set of config files once per module; return its directory."""
+    root = tmp_path_factory.mktemp("configs")
+    dirs = {}
+
+    def _config_dir(files: dict[str, str]):
+        key = tuple(files.items())
+        if key not in dirs:
+            path = root / f"cfg{len(dirs)}"
+            path.mkdir()
+            for name, code in files.items():
+                (path / name).write_text(textwrap.dedent(code))
+            dirs[key] = path
+        return dirs[key]
+
+    return _config_dir
@@ -1,46 +1,49 @@
 from cfgx.cli import main
-from cfgx.config import dumps, format as format_config, load
+from cfgx.config import dumps, format as format_config
 
+_SIMPLE_SOURCE = "config = {'a': 1}\n"
+_NESTED_SOURCE = "config = {'a': {'b': 1}}\n"
+_LAZY_SOURCE = "from cfgx import Lazy\nconfig = {'a': Lazy('1 + 1')}\n"
 
-def test_render_basic(capsys, tmp_path):
-    cfg_path = tmp_path / "cfg.py"
-    cfg_path.write_text("config = {'a': 1}\n")
+# Expected outputs are built once at import from the configs the sources produce.
+_EXPECTED_RENDER = f"{format_config({'a': 1})}\n"
+_EXPECTED_RENDER_OVERRIDES = f"{format_config({'a': {'b': 2}, 'c': 3})}\n"
+_EXPECTED_RENDER_RAW = f"{format_config({'a': 1}, format='raw')}\n"
+_EXPECTED_DUMP = dumps({"a": 1})
+
+
+def test_render_basic(capsys, config_dir):
+    cfg_path = config_dir({"cfg.py": _SIMPLE_SOURCE}) / "cfg.py"
 
     exit_code = main(["render", str(cfg_path)])
 
     out = capsys.readouterr().out
     assert exit_code == 0
-    assert out == f"{format_config(load(cfg_path))}\n"
+    assert out == _EXPECTED_RENDER
 
 
-def test_render_overrides_list(capsys, tmp_path):
-    cfg_path = tmp_path / "cfg.py"
-    cfg_path.write_text("config = {'a': {'b': 1}}\n")
+def test_render_overrides_list(capsys, config_dir):
+    cfg_path = config_dir({"cfg.py": _NESTED_SOURCE}) / "cfg.py"
 
     exit_code = main(["render", str(cfg_path), "-o", "a.b=2", "c=3"])
 
     out = capsys.readouterr().out
     assert exit_code == 0
-    expected = format_config(
-        load(cfg_path, overrides=["a.b=2", "c=3"]),
-    )
-    assert out == f"{expected}\n"
+    assert out == _EXPECTED_RENDER_OVERRIDES
 
 
-def test_dump_basic(capsys, tmp_path):
-    cfg_path = tmp_path / "cfg.py"
-    cfg_path.write_text("config = {'a': 1}\n")
+def test_dump_basic(capsys, config_dir):
+    cfg_path = config_dir({"cfg.py": _SIMPLE_SOURCE}) / "cfg.py"
 
     exit_code = main(["dump", str(cfg_path)])
 
     out = capsys.readouterr().out
     assert exit_code == 0
-    assert out == dumps(load(cfg_path))
+    assert out == _EXPECTED_DUMP
 
 
-def test_render_no_resolve_lazy(capsys, tmp_path):
-    cfg_path = tmp_path / "cfg.py"
-    cfg_path.write_text("from cfgx import Lazy\nconfig = {'a': Lazy('1 + 1')}\n")
+def test_render_no_resolve_lazy(capsys, config_dir):
+    cfg_path = config_dir({"cfg.py": _LAZY_SOURCE}) / "cfg.py"
 
     exit_code = main(["render", str(cfg_path), "--no-resolve-lazy"])
 
@@ -49,12 +52,11 @@ def test_render_no_resolve_lazy(capsys, tmp_path):
     assert "Lazy(" in out
 
 
-def test_render_raw(capsys, tmp_path):
-    cfg_path = tmp_path / "cfg.py"
-    cfg_path.write_text("config = {'a': 1}\n")
+def test_render_raw(capsys, config_dir):
+    cfg_path = config_dir({"cfg.py": _SIMPLE_SOURCE}) / "cfg.py"
 
     exit_code = main(["render", str(cfg_path), "--format", "raw"])
 
     out = capsys.readouterr().out
     assert exit_code == 0
-    assert out == f"{format_config(load(cfg_path), format='raw')}\n"
+    assert out == _EXPECTED_RENDER_RAW
@@ -1,15 +1,19 @@
+import subprocess
 from pprint import pformat
 
 import pytest
 
 from cfgx.config import (
     Lazy,
+    Replace,
     Update,
+    _ruff_format,
     apply_overrides,
     dump,
     dumps,
     format,
     infer_type,
+    merge,
     parse_key_path,
     resolve_lazy,
     set_nested,
@@ -18,40 +22,46 @@ from cfgx.config import (
 
 ### --- parse_key_path tests --- ###
 
-
-@pytest.mark.parametrize(
-    "input_path, expected",
-    [
-        ("a.b.c", ["a", "b", "c"]),
-        ("a[0].b", ["a", 0, "b"]),
-        ("x[1][2].y", ["x", 1, 2, "y"]),
-        ("x[-1].y", ["x", -1, "y"]),
-        ("a", ["a"]),
-        ("a[0]", ["a", 0]),
-    ],
+PARSE_CASES = (
+    ("a.b.c", ["a", "b", "c"]),
+    ("a[0].b", ["a", 0, "b"]),
+    ("x[1][2].y", ["x", 1, 2, "y"]),
+    ("x[-1].y", ["x", -1, "y"]),
+    ("a", ["a"]),
+    ("a[0]", ["a", 0]),
+    ("a[x].b", ["a[x]", "b"]),
+    ("a..b[0][1]", ["a", "b", 0, 1]),
+    ("x.[+1]", ["x", 1]),
+    ("[ 0]", [0]),
 )
+
+
+@pytest.mark.parametrize("input_path, expected", PARSE_CASES)
 def test_parse_key_path(input_path, expected):
     assert parse_key_path(input_path) == expected
 
 
 ### --- infer_type tests --- ###
 
-
-@pytest.mark.parametrize(
-    "input_val, expected",
-    [
-        ("123", 123),
-        ("3.14", 3.14),
-        ("3e-4", 3e-4),
-        ("True", True),
-        ("None", None),
-        ("[1, 2]", [1, 2]),
-        ("{'x': 5}", {"x": 5}),
-        ("{'x': [{'a': 1}, {'b': 2}]}", {"x": [{"a": 1}, {"b": 2}]}),
-        ("'hello'", "hello"),
-        ("unquoted_string", "unquoted_string"),  # fallback
-    ],
+INFER_CASES = (
+    ("123", 123),
+    ("-12", -12),
+    ("0x10", 16),
+    ("007", "007"),  # not a valid int literal
+    ("3.14", 3.14),
+    ("3e-4", 3e-4),
+    ("True", True),
+    ("None", None),
+    ("false", "false"),
+    ("[1, 2]", [1, 2]),
+    ("{'x': 5}", {"x": 5}),
+    ("{'x': [{'a': 1}, {'b': 2}]}", {"x": [{"a": 1}, {"b": 2}]}),
+    ("'hello'", "hello"),
+    ("unquoted_string", "unquoted_string"),  # fallback
 )
+
+
+@pytest.mark.parametrize("input_val, expected", INFER_CASES)
 def test_infer_type(input_val, expected):
     assert infer_type(input_val) == expected
 
@@ -89,6 +99,95 @@ def test_resolve_lazy_skips_tuples():
     assert cfg["b"] == 2
 
 
+def test_resolve_lazy_expression_math_in_comprehension():
+    cfg = {"values": [4, 9], "roots": Lazy("[math.sqrt(x) for x in c['values']]")}
+    resolve_lazy(cfg)
+    assert cfg["roots"] == [2.0, 3.0]
+
+
+def test_expression_names_do_not_leak_between_evals():
+    resolve_lazy({"a": Lazy("[(math := 0) for _ in 'x']")})
+    merge({"a": 1}, {"a": Update("[(v := 5) for _ in 'x'][0]")})
+    cfg = {"a": Lazy("math.sqrt(4)")}
+    resolve_lazy(cfg)
+    assert cfg["a"] == 2.0
+    with pytest.raises(NameError):
+        resolve_lazy({"b": Lazy("v")})
+
+
+def test_resolve_lazy_proxy_iteration_and_slices():
+    cfg = {
+        "model": {"b": 1, "a": Lazy("2")},
+        "layers": [1, Lazy("c.model.a * 2"), 3],
+        "keys": Lazy("sorted(c.model)"),
+        "tail": Lazy("c.layers[1:]"),
+        "size": Lazy("len(c.model) + len(c.layers)"),
+    }
+    resolve_lazy(cfg)
+    assert cfg["keys"] == ["a", "b"]
+    assert cfg["tail"] == [4, 3]
+    assert cfg["size"] == 5
+
+
+def test_resolve_lazy_result_with_nested_lazy_resolves():
+    cfg = {
+        "size": Lazy("len(c.model)"),
+        "model": Lazy(lambda c: {"dim": Lazy("2 * 4"), "depth": 3}),
+        "static": {"items": [1, {"k": "v"}]},
+    }
+    resolve_lazy(cfg)
+    assert cfg == {
+        "size": 2,
+        "model": {"dim": 8, "depth": 3},
+        "static": {"items": [1, {"k": "v"}]},
+    }
+
+
+def test_resolve_lazy_cycle_reports_nested_path():
+    cfg = {"model": {"layers": [Lazy("c.model.layers[0]")]}}
+    with pytest.raises(ValueError, match=r"cycle detected at model\.layers\[0\]"):
+        resolve_lazy(cfg)
+
+
+def test_resolve_lazy_missing_attribute_raises_attribute_error():
+    cfg = {"a": 1, "b": Lazy("getattr(c, 'missing', c.a + 1)")}
+    resolve_lazy(cfg)
+    assert cfg["b"] == 2
+
+    with pytest.raises(AttributeError, match="missing"):
+        resolve_lazy({"b": Lazy("c.missing")})
+
+
+def test_resolve_lazy_reuses_proxies_per_path():
+    cfg = {"model": {"layers": [1]}, "same": Lazy("c.model is c['model']")}
+    resolve_lazy(cfg)
+    assert cfg["same"] is True
+
+
+### --- merge tests --- ###
+
+
+def test_merge_does_not_mutate_inputs():
+    base = {"model": {"name": "resnet", "dropout": 0.5}, "tags": ["a"]}
+    override = {"model": {"dropout": 0.1, "head": {"dim": 8}}}
+    merged = merge(base, override)
+    assert merged == {
+        "model": {"name": "resnet", "dropout": 0.1, "head": {"dim": 8}},
+        "tags": ["a"],
+    }
+    assert base == {"model": {"name": "resnet", "dropout": 0.5}, "tags": ["a"]}
+    assert override == {"model": {"dropout": 0.1, "head": {"dim": 8}}}
+    assert merged["model"]["head"] is not override["model"]["head"]
+
+
+def test_merge_copies_replace_and_update_dicts():
+    shared = {"dim": 8}
+    merged = merge({"a": 1}, {"r": Replace(shared), "u": Update(lambda v=None: shared)})
+    merged["r"]["dim"] = 16
+    merged["u"]["dim"] = 32
+    assert shared == {"dim": 8}
+
+
 ### --- set_nested tests --- ###
 
 
@@ -118,56 +217,151 @@ def test_set_nested_last_list_index():
 
 ### --- apply_overrides tests --- ###
 
-
-def test_apply_overrides_basic():
-    cfg = {"a": {"b": 1}}
-    overrides = ["a.b=42"]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"a": {"b": 42}}
-
-
-def test_apply_overrides_nested_list():
-    cfg = {}
-    overrides = ["x.y[0].name=conv", "x.y[1].attrs.out_channels=64"]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"x": {"y": [{"name": "conv"}, {"attrs": {"out_channels": 64}}]}}
-
-
-def test_apply_overrides_mix_types():
-    cfg = {}
-    overrides = ["flag=True", "threshold=0.75", "num_layers=5", "name=model_v1"]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {
-        "flag": True,
-        "threshold": 0.75,
-        "num_layers": 5,
-        "name": "model_v1",
-    }
+# (id, config factory, overrides, expected); factories give each case a fresh dict.
+APPLY_CASES = [
+    ("basic", lambda: {"a": {"b": 1}}, ["a.b=42"], {"a": {"b": 42}}),
+    (
+        "nested_list",
+        dict,
+        ["x.y[0].name=conv", "x.y[1].attrs.out_channels=64"],
+        {"x": {"y": [{"name": "conv"}, {"attrs": {"out_channels": 64}}]}},
+    ),
+    (
+        "mix_types",
+        dict,
+        ["flag=True", "threshold=0.75", "num_layers=5", "name=model_v1"],
+        {"flag": True, "threshold": 0.75, "num_layers": 5, "name": "model_v1"},
+    ),
+    (
+        "value_with_operator_tokens",
+        dict,
+        ["foo=bar+=3", "baz=qux-=1", "zip=zot!=2"],
+        {"foo": "bar+=3", "baz": "qux-=1", "zip": "zot!=2"},
+    ),
+    (
+        "append",
+        lambda: {"existing_list": ["a", "b"], "nested": {"items": []}},
+        [
+            "existing_list+=c",
+            "new_list+=1",
+            "new_list+=2",
+            "new_list+=3",
+            "nested.items+=foo",
+            "nested.items+=bar",
+        ],
+        {
+            "existing_list": ["a", "b", "c"],
+            "new_list": [1, 2, 3],
+            "nested": {"items": ["foo", "bar"]},
+        },
+    ),
+    (
+        "set_negative_index",
+        lambda: {"layers": ["conv1", "conv2"]},
+        ["layers[-1]=conv3"],
+        {"layers": ["conv1", "conv3"]},
+    ),
+    (
+        "append_negative_index",
+        lambda: {"pipelines": [["a"], ["b"]]},
+        ["pipelines[-1]+=c"],
+        {"pipelines": [["a"], ["b", "c"]]},
+    ),
+    (
+        "delete_dict_key",
+        lambda: {"a": {"b": {"c": 123, "d": 456}}},
+        ["a.b.c!="],
+        {"a": {"b": {"d": 456}}},
+    ),
+    (
+        "delete_list_index",
+        lambda: {"layers": ["conv1", "conv2", "conv3"]},
+        ["layers[1]!="],
+        {"layers": ["conv1", "conv3"]},
+    ),
+    (
+        "delete_list_negative_index",
+        lambda: {"layers": ["conv1", "conv2", "conv3"]},
+        ["layers[-1]!="],
+        {"layers": ["conv1", "conv2"]},
+    ),
+    (
+        "delete_missing_path_noop",
+        lambda: {"a": {"b": 1}},
+        ["a.c!=", "missing!="],
+        {"a": {"b": 1}},
+    ),
+    (
+        "delete_list_value",
+        lambda: {"tags": ["debug", "train", "final"]},
+        ['tags-="train"'],
+        {"tags": ["debug", "final"]},
+    ),
+    (
+        "remove_missing_path_noop",
+        lambda: {"lists": [["a"]]},
+        ["missing.path-='a'", "lists[1]-='a'"],
+        {"lists": [["a"]]},
+    ),
+    (
+        "delete_int_key_in_dict",
+        lambda: {"items": {0: "a", 1: "b"}},
+        ["items[0]!="],
+        {"items": {1: "b"}},
+    ),
+    (
+        "remove_int_key_in_dict",
+        lambda: {"items": {0: ["a", "b"]}},
+        ["items[0]-='b'"],
+        {"items": {0: ["a"]}},
+    ),
+    (
+        "set_special_key",
+        lambda: {"a": {"b": 1}},
+        ["a.*=[1,2,3]"],
+        {"a": {"*": [1, 2, 3], "b": 1}},
+    ),
+    (
+        "set_through_tuple_item",
+        lambda: {"items": ({"a": 1},)},
+        ["items[0].a=2"],
+        {"items": ({"a": 2},)},
+    ),
+    (
+        "set_int_key_in_dict",
+        lambda: {"items": {}},
+        ["items[0]=1"],
+        {"items": {0: 1}},
+    ),
+    (
+        "combined_deletes_and_adds",
+        lambda: {
+            "model": {"layers": ["conv", "bn", "relu"], "dropout": 0.5},
+            "tags": ["baseline"],
+        },
+        [
+            "model.dropout!=",  # delete dict key
+            "model.layers[1]!=",  # delete list index
+            "model.layers+=maxpool",  # append
+            "tags+=debug",  # append
+            'tags-="baseline"',  # remove value
+        ],
+        {"model": {"layers": ["conv", "relu", "maxpool"]}, "tags": ["debug"]},
+    ),
+]
 
 
-def test_apply_overrides_value_with_operator_tokens():
-    cfg = {}
-    overrides = ["foo=bar+=3", "baz=qux-=1", "zip=zot!=2"]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"foo": "bar+=3", "baz": "qux-=1", "zip": "zot!=2"}
+@pytest.mark.parametrize(
+    "make_cfg, overrides, expected",
+    [pytest.param(*case[1:], id=case[0]) for case in APPLY_CASES],
+)
+def test_apply_overrides(make_cfg, overrides, expected):
+    assert apply_overrides(make_cfg(), overrides) == expected
 
 
-def test_apply_overrides_append():
-    cfg = {"existing_list": ["a", "b"], "nested": {"items": []}}
-    overrides = [
-        "existing_list+=c",
-        "new_list+=1",
-        "new_list+=2",
-        "new_list+=3",
-        "nested.items+=foo",
-        "nested.items+=bar",
-    ]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {
-        "existing_list": ["a", "b", "c"],
-        "new_list": [1, 2, 3],
-        "nested": {"items": ["foo", "bar"]},
-    }
+def test_apply_overrides_without_operator_raises():
+    with pytest.raises(ValueError, match="Invalid override"):
+        apply_overrides({}, ["a.b"])
 
 
 def test_apply_overrides_append_non_list_raises():
@@ -182,24 +376,12 @@ def test_apply_overrides_append_none_target_raises():
         apply_overrides(cfg, ["items[0]+=1"])
 
 
-def test_apply_overrides_set_negative_index():
-    cfg = {"layers": ["conv1", "conv2"]}
-    updated = apply_overrides(cfg, ["layers[-1]=conv3"])
-    assert updated == {"layers": ["conv1", "conv3"]}
-
-
 def test_apply_overrides_set_negative_index_out_of_bounds_raises():
     cfg = {"layers": ["conv1", "conv2"]}
     with pytest.raises(IndexError):
         apply_overrides(cfg, ["layers[-3]=conv3"])
 
 
-def test_apply_overrides_append_negative_index():
-    cfg = {"pipelines": [["a"], ["b"]]}
-    updated = apply_overrides(cfg, ["pipelines[-1]+=c"])
-    assert updated == {"pipelines": [["a"], ["b", "c"]]}
-
-
 def test_apply_overrides_append_negative_index_out_of_bounds_raises():
     cfg = {"pipelines": []}
     with pytest.raises(IndexError):
@@ -230,40 +412,12 @@ def test_update_nested_returning_update_is_unchecked():
     assert isinstance(cfg["a"], Update)
 
 
-def test_delete_dict_key():
-    cfg = {"a": {"b": {"c": 123, "d": 456}}}
-    overrides = ["a.b.c!="]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"a": {"b": {"d": 456}}}
-
-
 def test_delete_with_value_raises():
     cfg = {"a": {"b": 1}}
     with pytest.raises(ValueError, match="Delete overrides must not include a value"):
         apply_overrides(cfg, ["a.b!=2"])
 
 
-def test_delete_list_index():
-    cfg = {"layers": ["conv1", "conv2", "conv3"]}
-    overrides = ["layers[1]!="]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"layers": ["conv1", "conv3"]}
-
-
-def test_delete_list_negative_index():
-    cfg = {"layers": ["conv1", "conv2", "conv3"]}
-    overrides = ["layers[-1]!="]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"layers": ["conv1", "conv2"]}
-
-
-def test_delete_missing_path_noop():
-    cfg = {"a": {"b": 1}}
-    overrides = ["a.c!=", "missing!="]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"a": {"b": 1}}
-
-
 @pytest.mark.parametrize(
     "cfg, override",
     [
@@ -276,77 +430,45 @@ def test_delete_type_mismatch_raises(cfg, override):
         apply_overrides(cfg, [override])
 
 
-def test_delete_list_value():
-    cfg = {"tags": ["debug", "train", "final"]}
-    overrides = ['tags-="train"']
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"tags": ["debug", "final"]}
-
-
 def test_delete_list_value_non_list_raises():
     cfg = {"tags": "train"}
     with pytest.raises(ValueError, match="not a list"):
         apply_overrides(cfg, ['tags-="train"'])
 
 
-def test_remove_missing_path_noop():
-    cfg = {"lists": [["a"]]}
-    overrides = ["missing.path-='a'", "lists[1]-='a'"]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"lists": [["a"]]}
-
-
-def test_delete_int_key_in_dict():
-    cfg = {"items": {0: "a", 1: "b"}}
-    updated = apply_overrides(cfg, ["items[0]!="])
-    assert updated == {"items": {1: "b"}}
-
-
-def test_remove_int_key_in_dict():
-    cfg = {"items": {0: ["a", "b"]}}
-    updated = apply_overrides(cfg, ["items[0]-='b'"])
-    assert updated == {"items": {0: ["a"]}}
-
-
-def test_set_special_key():
-    cfg = {"a": {"b": 1}}
-    overrides = ["a.*=[1,2,3]"]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {"a": {"*": [1, 2, 3], "b": 1}}
-
-
-def test_set_through_tuple_item():
-    cfg = {"items": ({"a": 1},)}
-    updated = apply_overrides(cfg, ["items[0].a=2"])
-    assert updated == {"items": ({"a": 2},)}
+@pytest.mark.parametrize(
+    "override",
+    ["model.head.dim=8", "model.head.dims+=8", "model.head.dim=update:v + 1"],
+)
+def test_apply_overrides_under_none_value_raises(override):
+    cfg = {"model": {"head": None}}
+    with pytest.raises(TypeError):
+        apply_overrides(cfg, [override])
 
 
-def test_set_int_key_in_dict():
-    cfg = {"items": {}}
-    updated = apply_overrides(cfg, ["items[0]=1"])
-    assert updated == {"items": {0: 1}}
+def test_delete_under_none_value_noop():
+    cfg = {"model": {"head": None}}
+    updated = apply_overrides(cfg, ["model.head.dim!=", "model.head.dims-=1"])
+    assert updated == {"model": {"head": None}}
 
 
-def test_combined_deletes_and_adds():
-    cfg = {
-        "model": {
-            "layers": ["conv", "bn", "relu"],
-            "dropout": 0.5,
-        },
-        "tags": ["baseline"],
-    }
+def test_apply_overrides_shared_prefix_sequence():
+    cfg = {"model": {"layers": [{"units": 8}]}}
     overrides = [
-        "model.dropout!=",  # delete dict key
-        "model.layers[1]!=",  # delete list index
-        "model.layers+=maxpool",  # append
-        "tags+=debug",  # append
-        'tags-="baseline"',  # remove value
+        "model.layers[0].units=64",
+        "model.layers[0].kind=relu",
+        "model.layers[0].kind!=",
+        "model.layers[0].tags+=a",
+        "model.layers=[{'units': 1}]",
+        "model.layers[0].units+=2",
     ]
-    updated = apply_overrides(cfg, overrides)
-    assert updated == {
-        "model": {"layers": ["conv", "relu", "maxpool"]},
-        "tags": ["debug"],
-    }
+    with pytest.raises(ValueError, match="not a list"):
+        apply_overrides(cfg, overrides)
+    assert cfg == {"model": {"layers": [{"units": 1}]}}
+
+    cfg = {"model": {}}
+    apply_overrides(cfg, ["model.a.x=1", "model.a!=", "model.a.y=2"])
+    assert cfg == {"model": {"a": {"y": 2}}}
 
 
 ### --- format tests --- ###
@@ -377,12 +499,37 @@ def test_format_sort_keys():
     assert formatted == "{'a': 1, 'b': 2}"
 
 
+def test_format_sort_keys_nested_lists_and_mixed_keys():
+    cfg = {"b": [[1, {"y": 2, "x": 1}], [3]], 1: "one", "a": 0}
+    formatted = format(cfg, format="raw", sort_keys=True)
+    assert formatted == "{1: 'one', 'a': 0, 'b': [[1, {'x': 1, 'y': 2}], [3]]}"
+
+
 def test_format_sort_keys_skips_tuples():
     cfg = {"a": ({"b": 2, "a": 1},)}
     formatted = format(cfg, format="raw", sort_keys=True)
     assert formatted == "{'a': ({'b': 2, 'a': 1},)}"
 
 
+def test_format_ruff_reuses_cached_output(monkeypatch, request):
+    pytest.importorskip("ruff")
+    _ruff_format.cache_clear()
+    request.addfinalizer(_ruff_format.cache_clear)
+    calls = []
+    run = subprocess.run
+
+    def counting_run(*args, **kwargs):
+        calls.append(args)
+        return run(*args, **kwargs)
+
+    monkeypatch.setattr(subprocess, "run", counting_run)
+    cfg = {"ruff_cache_probe": [1, 2, 3]}
+    first = format(cfg, format="ruff")
+    second = format(cfg, format="ruff")
+    assert first == second == '{"ruff_cache_probe": [1, 2, 3]}'
+    assert len(calls) == 1
+
+
 def test_dump_simple_dict(tmp_path):
     cfg = {
         "model": {
@@ -395,10 +542,23 @@ def test_dump_simple_dict(tmp_path):
     snapshot_path = tmp_path / "config_snapshot.py"
     with open(snapshot_path, "w") as f:
         dump(cfg, f)
-    with open(snapshot_path, "r") as f:
-        content = f.read()
     expected = "config = " + pformat(cfg, width=88, sort_dicts=False) + "\n"
-    assert content == expected
+    assert snapshot_path.read_text() == expected
+
+
+def test_dumps_sort_keys():
+    cfg = {"b": {"d": 1, "c": 2}, "a": [{"f": 3, "e": 4}]}
+    assert dumps(cfg, sort_keys=True) == (
+        "config = {'a': [{'e': 4, 'f': 3}], 'b': {'c': 2, 'd': 1}}\n"
+    )
+    assert dumps(cfg, format="raw", sort_keys=True) == (
+        "config = {'a': [{'e': 4, 'f': 3}], 'b': {'c': 2, 'd': 1}}\n"
+    )
+
+
+def test_dumps_unknown_format_raises():
+    with pytest.raises(ValueError, match="Unknown format"):
+        dumps({"a": 1}, format="yaml", sort_keys=True)
 
 
 def test_dumps_simple_dict():